@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Seed Sprint 09 and update MASTER_CONTEXT.json in one process over one connection."""
+
+import importlib.util
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+def _load_script(filename):
+    """Import a sibling script whose file name is not a valid module name."""
+    module_name = Path(filename).stem.replace("-", "_")
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPTS_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def main():
+    """Run seed-sprint-09.py and update-master-context.py against a shared connection."""
+    seed = _load_script("seed-sprint-09.py")
+    update = _load_script("update-master-context.py")
+
+    seed.seed_sprint_09()
+
+    print()
+    update.main(seed._get_conn())
+
+if __name__ == "__main__":
+    main()
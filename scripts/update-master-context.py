@@ -1,246 +1,254 @@
 #!/usr/bin/env python3
 """Update MASTER_CONTEXT.json with session findings and create a snapshot."""
 
+import atexit
+import hashlib
 import json
-import sqlite3
 import sys
-from datetime import datetime, timezone
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional speedup; the stdlib encoder produces the same output
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # optional; snapshots are stored as plain JSON text without it
+    zstandard = None
+
 DB_PATH = Path("cmos/db/cmos.sqlite")
 MASTER_CONTEXT_PATH = Path("cmos/context/MASTER_CONTEXT.json")
+TEMPLATE_PATH = Path(__file__).resolve().parent / "master_context_template.json"
+
+# Static MASTER_CONTEXT skeleton, read once; session timestamps are filled in per call
+MASTER_CONTEXT_TEMPLATE = TEMPLATE_PATH.read_text(encoding="utf-8")
+SESSION_TIMESTAMP = "2025-11-07T22:30:00Z"
+
+# WAL + synchronous=NORMAL avoids the rollback journal and the extra fsync per commit
+SQLITE_PRAGMAS = """
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+"""
+
+# Serves both context_id lookups and the latest-snapshot query below
+SQL_CREATE_SNAPSHOTS_CONTEXT_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_context_snapshots_context_created
+    ON context_snapshots(context_id, created_at)
+"""
+SQL_SELECT_LATEST_SNAPSHOT_HASH = """
+    SELECT content_hash FROM context_snapshots
+    WHERE context_id = ?
+    ORDER BY created_at DESC LIMIT 1
+"""
+SQL_UPSERT_CONTEXT = """
+    INSERT INTO contexts (id, source_path, content, updated_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        content = excluded.content,
+        updated_at = excluded.updated_at
+"""
+SQL_SELECT_SNAPSHOT_CODEC_COLUMN = """
+    SELECT 1 FROM pragma_table_info('context_snapshots') WHERE name = 'content_codec'
+"""
+SQL_ADD_SNAPSHOT_CODEC_COLUMN = """
+    ALTER TABLE context_snapshots ADD COLUMN content_codec TEXT
+"""
+SQL_INSERT_SNAPSHOT = """
+    INSERT INTO context_snapshots (context_id, session_id, source, content_hash, content, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SQL_INSERT_SNAPSHOT_WITH_CODEC = """
+    INSERT INTO context_snapshots (context_id, session_id, source, content_hash, content, created_at, content_codec)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Snapshot content is zstd-compressed into a BLOB when zstandard is installed;
+# content_codec records how to decode it (NULL or missing means plain JSON text).
+# contexts.content stays plain JSON because SQLiteClient.getContext parses it.
+# Readers of context_snapshots.content must honour content_codec; see
+# _decode_snapshot_content. SQLiteClient only reads content_hash from this table.
+SNAPSHOT_CODEC = "zstd3"
+
+# Shared connection so repeated calls in one process reuse a single handle
+_conn = None
+
+def _get_conn():
+    """Return the shared database connection, opening it on first use."""
+    global _conn
+    if _conn is None:
+        import sqlite3
+        
+        # mode=rw refuses to create an empty database if the file disappears
+        conn = sqlite3.connect(f"file:{DB_PATH.as_posix()}?mode=rw", uri=True, check_same_thread=False)
+        conn.executescript(SQLITE_PRAGMAS)
+        atexit.register(conn.close)
+        _conn = conn
+    return _conn
+
+def _loads(text):
+    """Parse JSON text, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def _dumps_compact(data):
+    """Serialize to compact JSON text for database columns."""
+    if orjson is not None:
+        return orjson.dumps(data).decode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def _dumps_canonical(data):
+    """Serialize to compact JSON with sorted keys, the stable form used for content hashes."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+def _encode_snapshot_content(serialized):
+    """Return (content, codec) for a context_snapshots row."""
+    if zstandard is None:
+        return serialized, None
+    compressor = zstandard.ZstdCompressor(level=3)
+    return compressor.compress(serialized.encode("utf-8")), SNAPSHOT_CODEC
+
+def _decode_snapshot_content(content, codec):
+    """Return the JSON text of a context_snapshots row, decompressing if needed."""
+    if codec is None:
+        return content
+    if codec != SNAPSHOT_CODEC:
+        raise ValueError(f"Unknown snapshot content codec: {codec}")
+    if zstandard is None:
+        raise RuntimeError("zstandard is required to read zstd-compressed snapshots")
+    return zstandard.ZstdDecompressor().decompress(content).decode("utf-8")
+
+def _write_pretty(path, data):
+    """Write data to path as 2-space indented JSON."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        return
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
 
 def create_master_context_update():
     """Create updated MASTER_CONTEXT with session findings."""
     
-    context_data = {
-        "project": {
-            "name": "CMOS Starter Template",
-            "version": "0.0.0",
-            "description": "Updated with Mission Protocol CMOS integration analysis - Nov 2025",
-            "status": "active_development",
-            "start_date": "2025-11-07",
-            "deployment": {
-                "platform": "Local/Node.js",
-                "integration_target": "Mission Protocol v2 with optional CMOS support",
-                "environment": "development"
-            }
-        },
-        "working_memory": {
-            "active_domain": "cmos_integration",
-            "session_count": 1,
-            "last_session": "2025-11-07T22:30:00Z",
-            "agents_md_path": "./agents.md",
-            "agents_md_loaded": True,
-            "active_mission": "cmos_integration_planning",
-            "domains": {
-                "cmos_integration": {
-                    "status": "analysis_complete",
-                    "priority": 1,
-                    "current_mission": "sprint-09-planning",
-                    "missions": {
-                        "sprint-09": {
-                            "id": "sprint-09",
-                            "title": "CMOS Integration & Self-Containment",
-                            "status": "planned",
-                            "total_missions": 8,
-                            "focus": "Make Mission Protocol work standalone with optional CMOS integration"
-                        }
-                    },
-                    "critical_facts": [
-                        "Mission Protocol must work standalone without cmos/ directory",
-                        "CMOS is internal project management and will be removed before publishing",
-                        "Integration must be optional and non-breaking",
-                        "Default paths must move from cmos/ subdirectory to project root",
-                        "CMOS detection must be runtime-based with graceful degradation"
-                    ],
-                    "constraints": [
-                        "Cannot assume cmos/ directory exists",
-                        "All hardcoded cmos/ paths must be removed",
-                        "Sync operations must be non-blocking",
-                        "Must maintain backward compatibility",
-                        "Performance impact must be < 2%"
-                    ],
-                    "decisions_made": [
-                        "Mission Protocol will use file-based storage by default (project root)",
-                        "CMOS SQLite integration will be optional enhancement",
-                        "Created 8-mission sprint to implement changes incrementally",
-                        "Phased approach: self-containment → detection → optional sync",
-                        "Dual-write strategy for migration period"
-                    ],
-                    "files_created": [
-                        "analysis/cmos-integration-gap-analysis.md",
-                        "analysis/integration-architecture-plan.md",
-                        "analysis/migration-path.md",
-                        "scripts/seed-sprint-09.py"
-                    ],
-                    "key_insights": [
-                        "Original analysis incorrectly assumed tight coupling",
-                        "Revised approach focuses on loose, optional integration",
-                        "CMOS detection must not impact performance when absent",
-                        "Sync service must be completely optional"
-                    ]
-                }
-            }
-        },
-        "technical_context": {
-            "dependencies": [
-                "Node.js 18+",
-                "TypeScript 5+",
-                "Python 3.11+ (for CMOS only)",
-                "SQLite 3+ (optional)"
-            ],
-            "tooling": {
-                "seed_database": "python scripts/seed_sqlite.py --data-root <path>",
-                "validate_parity": "python scripts/validate_parity.py",
-                "update_context": "python scripts/update-master-context.py"
-            },
-            "reference_docs": [
-                "analysis/cmos-integration-gap-analysis.md",
-                "analysis/integration-architecture-plan.md",
-                "analysis/migration-path.md"
-            ],
-            "integration_points": [
-                "Optional CMOS detection in Mission Protocol",
-                "Optional sync service for data sharing",
-                "File-based storage with SQLite as secondary"
-            ]
-        },
-        "sprint_tracking": {
-            "current_sprint": "sprint-09",
-            "sprint_start": "2025-11-08",
-            "sprint_end": "2025-11-29",
-            "sprint_status": "planning"
-        },
-        "context_health": {
-            "anti_pattern_detection": True,
-            "compression_enabled": False,
-            "last_reset": "2025-11-07T22:30:00Z",
-            "sessions_since_reset": 1,
-            "size_kb": 0,
-            "size_limit_kb": 100
-        },
-        "ai_instructions": {
-            "preferred_language": "yaml",
-            "code_style": "mission_protocol_v2",
-            "testing_required": True,
-            "documentation_level": "comprehensive",
-            "special_instructions": [
-                "Always check for cmos/ directory existence before assuming it's present",
-                "Use configurable paths instead of hardcoded cmos/ paths",
-                "Implement graceful degradation for all CMOS-dependent features",
-                "Maintain backward compatibility at all times",
-                "Document optional vs required features clearly"
-            ]
-        },
-        "next_session_context": {
-            "blockers": [],
-            "important_reminders": [
-                "Start with Phase 1 missions (s09-m01, s09-m02) to establish self-containment",
-                "Verify all tests pass without cmos/ before proceeding to detection phase",
-                "Keep sync service completely optional and non-blocking",
-                "Update documentation after each phase"
-            ],
-            "key_reference_documents": [
-                "analysis/cmos-integration-gap-analysis.md",
-                "analysis/integration-architecture-plan.md",
-                "analysis/migration-path.md"
-            ],
-            "when_we_resume": [
-                "Begin implementation of s09-m01: Update default paths",
-                "Test standalone operation after each change",
-                "Create CMOS detector utility (s09-m03)",
-                "Integrate detection into AgenticController (s09-m04)"
-            ]
-        },
-        "metadata": {
-            "migrated_at": "2025-11-06T05:09:02.870476+00:00",
-            "source_version": "cmos-v1",
-            "last_updated": "2025-11-07T22:30:00Z",
-            "session_summary": "Completed comprehensive analysis of Mission Protocol and CMOS integration. Created 3 analysis documents, 8-mission sprint plan, and seeded database. Established correct architecture: Mission Protocol standalone with optional CMOS integration."
-        }
-    }
+    context_data = _loads(MASTER_CONTEXT_TEMPLATE)
+    context_data["working_memory"]["last_session"] = SESSION_TIMESTAMP
+    context_data["context_health"]["last_reset"] = SESSION_TIMESTAMP
+    context_data["metadata"]["last_updated"] = SESSION_TIMESTAMP
     
-    # Write to MASTER_CONTEXT.json
-    MASTER_CONTEXT_PATH.write_text(
-        json.dumps(context_data, indent=2, ensure_ascii=False),
-        encoding="utf-8"
-    )
+    # Write to MASTER_CONTEXT.json (pretty-printed for humans)
+    _write_pretty(MASTER_CONTEXT_PATH, context_data)
     
     print(f"✅ Updated MASTER_CONTEXT.json at {MASTER_CONTEXT_PATH}")
     return context_data
 
-def create_context_snapshot(context_data):
-    """Create a snapshot in the SQLite database."""
+def create_context_snapshot(context_data, conn=None):
+    """Create a snapshot in the SQLite database.
+    
+    Pass conn to reuse an open connection; defaults to the shared one.
+    """
+    
+    # Imported here so importing this module without touching the database stays cheap
+    import sqlite3
+    from datetime import datetime, timezone
+    
+    # The database copy is compact; only the file on disk needs indentation
+    serialized = _dumps_compact(context_data)
+    # Hash the canonical form so formatting changes never defeat the dedup; this matches
+    # SQLiteClient.computeContextHash on the TypeScript side
+    canonical = _dumps_canonical(context_data)
+    content_hash = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    # One timestamp for the whole snapshot so every row agrees on when it was taken
+    now_iso = datetime.now(timezone.utc).isoformat()
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Check if master_context exists
-        cursor.execute("SELECT id FROM contexts WHERE id = 'master_context'")
-        exists = cursor.fetchone()
-        
-        if exists:
-            # Update existing
-            cursor.execute("""
-                UPDATE contexts 
-                SET content = ?, updated_at = ?
-                WHERE id = 'master_context'
-            """, (
-                json.dumps(context_data, indent=2, ensure_ascii=False),
-                datetime.now(timezone.utc).isoformat()
-            ))
-            print("✅ Updated existing master_context record")
-        else:
-            # Insert new
-            cursor.execute("""
-                INSERT INTO contexts (id, source_path, content, updated_at)
-                VALUES (?, ?, ?, ?)
-            """, (
+        if conn is None:
+            conn = _get_conn()
+        # The connection context manager commits on success and rolls back on error
+        with conn:
+            cursor = conn.cursor()
+            
+            # Take the write lock up front so every write lands in one commit
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(SQL_CREATE_SNAPSHOTS_CONTEXT_INDEX)
+            
+            # Insert or update master_context in a single statement; this row can change
+            # without a snapshot (e.g. SQLiteClient.setContext with snapshot: false)
+            cursor.execute(SQL_UPSERT_CONTEXT, (
                 "master_context",
                 str(MASTER_CONTEXT_PATH),
-                json.dumps(context_data, indent=2, ensure_ascii=False),
-                datetime.now(timezone.utc).isoformat()
+                serialized,
+                now_iso
             ))
-            print("✅ Created new master_context record")
+            
+            # Skip the snapshot when the latest one already holds this content
+            cursor.execute(SQL_SELECT_LATEST_SNAPSHOT_HASH, ("master_context",))
+            latest = cursor.fetchone()
+            snapshot_created = not (latest and latest[0] == content_hash)
+            if snapshot_created:
+                snapshot_content, snapshot_codec = _encode_snapshot_content(serialized)
+                if snapshot_codec is None:
+                    cursor.execute(SQL_INSERT_SNAPSHOT, (
+                        "master_context",
+                        "session-2025-11-07-cmos-analysis",
+                        str(MASTER_CONTEXT_PATH),
+                        content_hash,
+                        snapshot_content,
+                        now_iso
+                    ))
+                else:
+                    # Only compressed rows need the codec column, so add it on first use
+                    cursor.execute(SQL_SELECT_SNAPSHOT_CODEC_COLUMN)
+                    if cursor.fetchone() is None:
+                        cursor.execute(SQL_ADD_SNAPSHOT_CODEC_COLUMN)
+                    cursor.execute(SQL_INSERT_SNAPSHOT_WITH_CODEC, (
+                        "master_context",
+                        "session-2025-11-07-cmos-analysis",
+                        str(MASTER_CONTEXT_PATH),
+                        content_hash,
+                        snapshot_content,
+                        now_iso,
+                        snapshot_codec
+                    ))
         
-        # Create snapshot
-        cursor.execute("""
-            INSERT INTO context_snapshots (context_id, session_id, source, content_hash, content, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            "master_context",
-            "session-2025-11-07-cmos-analysis",
-            str(MASTER_CONTEXT_PATH),
-            "snapshot_" + datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S"),
-            json.dumps(context_data, indent=2, ensure_ascii=False),
-            datetime.now(timezone.utc).isoformat()
-        ))
-        
-        conn.commit()
-        print("✅ Created context snapshot in SQLite")
+        print("✅ Upserted master_context record")
+        if snapshot_created:
+            print("✅ Created context snapshot in SQLite")
+        else:
+            print("✅ master_context unchanged; snapshot skipped")
+        return snapshot_created
         
     except sqlite3.Error as e:
         print(f"❌ Database error: {e}")
         sys.exit(1)
-    finally:
-        if conn:
-            conn.close()
 
-if __name__ == "__main__":
+def main(conn=None):
+    """Update MASTER_CONTEXT.json and snapshot it into SQLite."""
+    # Check before rewriting MASTER_CONTEXT.json; a caller-supplied conn is not tied to DB_PATH
+    if conn is None and not DB_PATH.is_file():
+        print(f"❌ Database not found: {DB_PATH}")
+        sys.exit(1)
+    
     print("Updating MASTER_CONTEXT.json with session findings...")
     context_data = create_master_context_update()
     
     print("\nCreating context snapshot in SQLite...")
-    create_context_snapshot(context_data)
+    snapshot_created = create_context_snapshot(context_data, conn)
     
     print("\n✅ Master context update complete!")
     print(f"   - MASTER_CONTEXT.json updated")
     print(f"   - SQLite context record updated")
-    print(f"   - Context snapshot created")
+    if snapshot_created:
+        print(f"   - Context snapshot created")
+    else:
+        print(f"   - Context snapshot unchanged; none created")
     print(f"\nKey session outcomes captured:")
     print(f"   - Mission Protocol must work standalone")
     print(f"   - CMOS integration is optional")
     print(f"   - Sprint 09 created with 8 missions")
-    print(f"   - Analysis documents created in analysis/ directory")
\ No newline at end of file
+    print(f"   - Analysis documents created in analysis/ directory")
+
+if __name__ == "__main__":
+    main()